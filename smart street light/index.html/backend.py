@@ -1,5 +1,9 @@
 from flask import Flask, jsonify, request, session
 from flask_cors import CORS
+try:
+    from flask_orjson import OrjsonProvider
+except ImportError:
+    OrjsonProvider = None
 from functools import wraps
 try:
     import RPi.GPIO as GPIO
@@ -10,8 +14,15 @@ except ImportError:
 import time
 import random
 import datetime
+import threading
 
 app = Flask(__name__)
+if OrjsonProvider is not None:
+    app.json = OrjsonProvider(app)  # orjson for every jsonify() call
+else:
+    # Machine-read JSON: no key sorting, no pretty-printing
+    app.json.sort_keys = False
+    app.json.compact = True
 
 # ============================================================================
 # CONFIGURATION - CHANGE THESE IN PRODUCTION
@@ -89,6 +100,10 @@ light_states = [
     {'id': 4, 'relay_state': 'OFF', 'voltage': 0, 'current': 0, 'lux': 0}
 ]
 
+# Held while light_states is written, so a request's sensor pass and its
+# totals never see a half-applied /control update
+state_lock = threading.Lock()
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -144,25 +159,30 @@ def read_sensor_data(light_index):
         return 0, 0, 0
 
 def update_light_data():
-    """Update sensor data for all lights"""
-    for i in range(4):
-        voltage, current, lux = read_sensor_data(i)
-        light_states[i]['voltage'] = voltage
-        light_states[i]['current'] = current
-        light_states[i]['lux'] = lux
-
-def calculate_stats():
-    """Calculate system statistics"""
-    active_lights = [light for light in light_states if light['relay_state'] == 'ON']
-    
+    """Update sensor data for all lights
+    Returns (active_count, total_current, total_lux) over the lights that
+    are ON, summed in the same pass so no second walk is needed
+    """
+    active_count = 0
+    total_current = 0
+    total_lux = 0
+    with state_lock:
+        for i in range(4):
+            light = light_states[i]
+            voltage, current, lux = read_sensor_data(i)
+            light['voltage'] = voltage
+            light['current'] = current
+            light['lux'] = lux
+            if light['relay_state'] == 'ON':
+                active_count += 1
+                total_current += current
+                total_lux += lux
+    return active_count, total_current, total_lux
+
+def calculate_stats(active_count, total_current, total_lux):
+    """Calculate system statistics from the totals of update_light_data()"""
     # Voltage remains constant at 12V when any light is on
-    total_voltage = 12.0 if active_lights else 0
-    
-    # Current is sum of all active lights
-    total_current = sum(light['current'] for light in active_lights)
-    
-    # Total luminosity
-    total_lux = sum(light['lux'] for light in active_lights)
+    total_voltage = 12.0 if active_count else 0
     
     # System status
     system_status = 'No Fault'
@@ -178,8 +198,8 @@ def calculate_stats():
 
 def generate_chart_data():
     """Generate historical chart data"""
-    now = datetime.datetime.now()
-    labels = [(now - datetime.timedelta(hours=5-i)).strftime('%H:%M') for i in range(6)]
+    now = time.time()
+    labels = [time.strftime('%H:%M', time.localtime(now - (5-i) * 3600)) for i in range(6)]
     
     # Generate realistic historical data
     voltage_data = [round(random.uniform(11.5, 12.5), 1) for _ in range(6)]
@@ -215,10 +235,10 @@ def get_data():
     """Get current system data (requires authentication)"""
     try:
         # Update sensor readings
-        update_light_data()
+        totals = update_light_data()
         
         # Calculate statistics
-        stats = calculate_stats()
+        stats = calculate_stats(*totals)
         
         # Generate chart data
         charts = generate_chart_data()
@@ -227,7 +247,7 @@ def get_data():
             'lights': light_states,
             'stats': stats,
             'charts': charts,
-            'time': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'time': time.strftime('%Y-%m-%d %H:%M:%S')
         }
         
         return jsonify(data), 200
@@ -302,19 +322,20 @@ def control_light():
         else:
             print(f"⚙️  SIMULATION: Light {light_id} {action.upper()}")
         
-        # Update state
-        new_state = 'ON' if action == 'on' else 'OFF'
-        light_states[light_index]['relay_state'] = new_state
-        
-        # Update sensor values immediately
-        if action == 'on':
-            light_states[light_index]['voltage'] = round(random.uniform(11.5, 12.5), 1)
-            light_states[light_index]['current'] = round(random.uniform(1.0, 1.4), 1)
-            light_states[light_index]['lux'] = random.randint(450, 550)
-        else:
-            light_states[light_index]['voltage'] = 0
-            light_states[light_index]['current'] = 0
-            light_states[light_index]['lux'] = 0
+        with state_lock:
+            # Update state
+            new_state = 'ON' if action == 'on' else 'OFF'
+            light_states[light_index]['relay_state'] = new_state
+            
+            # Update sensor values immediately
+            if action == 'on':
+                light_states[light_index]['voltage'] = round(random.uniform(11.5, 12.5), 1)
+                light_states[light_index]['current'] = round(random.uniform(1.0, 1.4), 1)
+                light_states[light_index]['lux'] = random.randint(450, 550)
+            else:
+                light_states[light_index]['voltage'] = 0
+                light_states[light_index]['current'] = 0
+                light_states[light_index]['lux'] = 0
         
         return jsonify({
             'success': True,
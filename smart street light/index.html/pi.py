@@ -6,64 +6,273 @@ Run: python3 smart_street_light_combined.py
 Access: http://raspberry-pi-ip:5000
 """
 
+import atexit
+import os
 import time
 import threading
 import signal
 import sys
-from datetime import datetime
-from collections import deque
+import gzip
+import hashlib
+import re
+from email.utils import formatdate
+from queue import Queue, Empty, Full
 
 try:
     import RPi.GPIO as GPIO # pyright: ignore[reportMissingModuleSource]
 except (RuntimeError, ModuleNotFoundError):
-    import lgpio as GPIO # pyright: ignore[reportMissingImports]
+    import lgpio # pyright: ignore[reportMissingImports]
+    GPIO = None  # Replaced by LgpioGPIO below
 
-from flask import Flask, render_template_string, jsonify, request # pyright: ignore[reportMissingImports]
+try:
+    import orjson # pyright: ignore[reportMissingImports]
+    _dumps = orjson.dumps
+except ModuleNotFoundError:
+    import json
+
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+from flask import Flask, Response, request, send_from_directory # pyright: ignore[reportMissingImports]
+
+try:
+    from flask_orjson import OrjsonProvider # pyright: ignore[reportMissingImports]
+except ModuleNotFoundError:
+    OrjsonProvider = None
+
+try:
+    from waitress import serve # pyright: ignore[reportMissingImports]
+except ModuleNotFoundError:
+    serve = None
+
+# ------------------ lgpio Adapter ------------------
+class LgpioGPIO:
+    """RPi.GPIO-style wrapper that keeps one lgpio chip handle open
+
+    The chip is opened once and every pin is claimed up front, so relay
+    writes and LDR reads reuse the same handle instead of reopening it.
+    """
+    BCM = "BCM"
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+
+    def __init__(self, chip=0):
+        self._handle = lgpio.gpiochip_open(chip)
+        self._group_bits = {}  # output pin -> (group leader pin, bit index)
+
+    def setmode(self, mode):
+        pass  # lgpio always uses BCM numbering
+
+    def setup(self, pin, direction):
+        if direction == self.OUT:
+            lgpio.gpio_claim_output(self._handle, pin, self.HIGH)
+        else:
+            lgpio.gpio_claim_input(self._handle, pin)
+
+    def setup_input_group(self, pins):
+        """Claim pins as one group so input_group() reads them in one call"""
+        lgpio.group_claim_input(self._handle, pins)
+
+    def setup_output_group(self, pins, level):
+        """Claim pins as one group so output_group() drives them in one call"""
+        lgpio.group_claim_output(self._handle, pins, [level] * len(pins))
+        for bit, pin in enumerate(pins):
+            self._group_bits[pin] = (pins[0], bit)
+
+    def output(self, pin, level):
+        if pin in self._group_bits:
+            leader, bit = self._group_bits[pin]
+            lgpio.group_write(self._handle, leader, level << bit, 1 << bit)
+        else:
+            lgpio.gpio_write(self._handle, pin, level)
+
+    def output_group(self, pins, bits, mask):
+        """Set the levels of the masked pins of a claimed group (bit i = pins[i])"""
+        lgpio.group_write(self._handle, pins[0], bits, mask)
+
+    def input(self, pin):
+        return lgpio.gpio_read(self._handle, pin)
+
+    def input_group(self, pins):
+        """Return the levels of a claimed group as a bitmask (bit i = pins[i])"""
+        return lgpio.group_read(self._handle, pins[0])[1]
+
+    def cleanup(self):
+        lgpio.gpiochip_close(self._handle)
+
+if GPIO is None:
+    GPIO = LgpioGPIO()
 
 # ------------------ CONFIG ------------------
 SAMPLE_INTERVAL = 2
 RELAY_PINS = [17, 18, 27, 22]
+NUM_LIGHTS = len(RELAY_PINS)
 LDR_PINS = [5, 6, 13, 19]
 AUTO_MODE = False  # Set to True for automatic control
+SSE_HEARTBEAT = 15  # Seconds between keep-alive comments on idle streams
+SSE_QUEUE_SIZE = 8  # Pending payloads per client before updates are dropped
+HISTORY_LEN = 6  # Readings shown on the voltage/current charts
+WEB_THREADS = 8  # waitress worker threads; each open /api/stream holds one
+MAX_STREAMS = WEB_THREADS - 2  # Leave workers free for /control and page loads
+STREAM_RETRY_MS = 10000  # Browser retry delay after a 503 from a full /api/stream
+DEBUG = os.environ.get("SSL_DEBUG", "0") == "1"  # Log every web toggle
+CHART_JS_FILE = "chart-3.9.1.min.js"  # Local copy in static/, used instead of the CDN when present
+CHART_JS_CDN = "https://cdnjs.cloudflare.com/ajax/libs/Chart.js/3.9.1/chart.min.js"
 
 # ------------------ GLOBAL DATA ------------------
-lights_data = [
-    {"relay_state": "OFF", "lux": 0, "voltage": 0, "current": 0}
-    for i in range(4)
-]
-
-# Chart data storage (last 6 readings)
-voltage_history = deque(maxlen=6)
-current_history = deque(maxlen=6)
-time_labels = deque(maxlen=6)
-
-# Initialize with zeros
-for i in range(6):
-    voltage_history.append(0)
-    current_history.append(0)
-    time_labels.append(f"{i:02d}:00")
+# Per-light readings as parallel lists indexed by light (0-3)
+relay_states = [0] * NUM_LIGHTS  # 1 = ON, 0 = OFF
+lux_values = [0] * NUM_LIGHTS
+voltages = [0] * NUM_LIGHTS
+currents = [0] * NUM_LIGHTS
+STATE_NAMES = ("OFF", "ON")
+
+# (voltage, current, lux) sums over all lights, recomputed once per sample.
+# Replaced as a whole tuple so readers never see a half-updated set.
+latest_totals = (0, 0, 0)
+
+# Chart data storage (last HISTORY_LEN readings)
+# Fixed ring buffers sharing one index; _history_head is the oldest slot
+voltage_history = [0] * HISTORY_LEN
+current_history = [0] * HISTORY_LEN
+time_labels = [f"{i:02d}:00" for i in range(HISTORY_LEN)]
+_history_head = 0
+
+# The "charts" part of the payload in oldest-first order. Rebuilt only when
+# record_history() writes a sample, so control() publishes reuse it as is.
+_charts_cache = None
+
+# Serialized dashboard payload, rebuilt by the sensor thread once per sample.
+# Readers just load the reference: rebinding a global is atomic and bytes are
+# immutable. The lock only keeps the sensor thread and control() from
+# publishing over each other.
+_LATEST_PAYLOAD_JSON = b'{}'
+_publish_lock = threading.Lock()
+
+# Last-Modified for the payload, in whole seconds and strictly increasing so
+# two changes within one second still get different validators
+_PAYLOAD_MTIME = 0
+_PAYLOAD_LAST_MODIFIED = ''
+
+# One queue per connected /api/stream client, at most MAX_STREAMS
+_subscribers = set()
+_subscribers_lock = threading.Lock()
 
 # ------------------ GPIO Setup ------------------
 GPIO.setmode(GPIO.BCM)
-for pin in RELAY_PINS:
-    GPIO.setup(pin, GPIO.OUT)
-    GPIO.output(pin, GPIO.HIGH)
+if isinstance(GPIO, LgpioGPIO):
+    # Claim relays and LDRs as groups: one call per read or batch of writes
+    GPIO.setup_output_group(RELAY_PINS, GPIO.HIGH)
+    GPIO.setup_input_group(LDR_PINS)
+else:
+    for pin in RELAY_PINS:
+        GPIO.setup(pin, GPIO.OUT)
+        GPIO.output(pin, GPIO.HIGH)
+
+    for pin in LDR_PINS:
+        GPIO.setup(pin, GPIO.IN)
+
+# /control action -> relay level and stored state (relays are active LOW)
+_ACTION_LEVEL = {"on": GPIO.LOW, "off": GPIO.HIGH}
+_ACTION_STATE = {"on": 1, "off": 0}
+
+# Keep each relay's sysfs value file open when the pin is exported there
+# as an output, so a toggle is a seek + write instead of an open/write/close
+def _sysfs_gpio_base():
+    """sysfs number of BCM GPIO 0: the base of the SoC pinctrl gpiochip
+    (0 on older kernels, e.g. 512 from 6.6 on)
+    """
+    root = '/sys/class/gpio'
+    try:
+        chips = [name for name in os.listdir(root) if name.startswith('gpiochip')]
+    except OSError:
+        return 0
+    for chip in chips:
+        try:
+            with open(f'{root}/{chip}/label') as f:
+                if not f.read().startswith('pinctrl-'):
+                    continue
+            with open(f'{root}/{chip}/base') as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            continue
+    return 0
+
+def _open_relay_fd(pin, base):
+    path = f'/sys/class/gpio/gpio{base + pin}'
+    try:
+        with open(f'{path}/direction') as f:
+            if f.read().strip() != 'out':
+                return None
+        return open(f'{path}/value', 'wb', buffering=0)
+    except OSError:
+        return None
 
-for pin in LDR_PINS:
-    GPIO.setup(pin, GPIO.IN)
+_SYSFS_BASE = _sysfs_gpio_base()
+_relay_fds = [_open_relay_fd(pin, _SYSFS_BASE) for pin in RELAY_PINS]
+
+@atexit.register
+def _close_relay_fds():
+    for fd in _relay_fds:
+        if fd is not None:
+            fd.close()
 
 # ------------------ Flask App ------------------
-app = Flask(_name_)
+app = Flask(__name__)
+if OrjsonProvider is not None:
+    app.json = OrjsonProvider(app)
+else:
+    # Machine-read JSON: no key sorting, no pretty-printing
+    app.json.sort_keys = False
+    app.json.compact = True
+
+def _json(obj, status=200):
+    """Serialize obj straight to a JSON response, bypassing jsonify"""
+    return Response(_dumps(obj), status=status, mimetype='application/json')
+
+# ========== LIGHT CARD TEMPLATE ==========
+# Expanded once per relay into {LIGHT_CARDS} in HTML_TEMPLATE
+LIGHT_CARD_TMPL = """
+            <div class="light-card" id="light-card-{i}">
+                <div class="light-header">
+                    <div class="light-name">Light {i}</div>
+                    <div class="light-bulb light-off" id="bulb-{i}">○</div>
+                </div>
+                <div class="light-info">
+                    <div class="info-item">
+                        <div class="info-label">Voltage</div>
+                        <div class="info-value" id="voltage-{i}">0V</div>
+                    </div>
+                    <div class="info-item">
+                        <div class="info-label">Current</div>
+                        <div class="info-value" id="current-{i}">0A</div>
+                    </div>
+                    <div class="info-item">
+                        <div class="info-label">Lux</div>
+                        <div class="info-value" id="lux-{i}">0</div>
+                    </div>
+                </div>
+                <div style="text-align: center;">
+                    <span class="status-badge status-off" id="status-{i}">OFF</span>
+                </div>
+                <div class="control-buttons">
+                    <button class="btn-control btn-on" onclick="controlLight({i}, 'on')">⚡ Turn ON</button>
+                    <button class="btn-control btn-off" onclick="controlLight({i}, 'off')">⭕ Turn OFF</button>
+                </div>
+            </div>
+"""
 
 # ========== HTML TEMPLATE ==========
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html>
 <head>
-    <title>Smart Street Light Dashboard - 4 Lights Control</title>
+    <title>Smart Street Light Dashboard - {LIGHT_COUNT} Lights Control</title>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/3.9.1/chart.min.js"></script>
+    <script src="{CHART_JS_SRC}"></script>
     <style>
         * {
             margin: 0;
@@ -466,126 +675,11 @@ HTML_TEMPLATE = """
             </div>
         </div>
         
-        <!-- 4 LIGHTS CONTROL SECTION -->
-        <h2 class="section-title">💡 Individual Light Control (4 Lights)</h2>
+        <!-- LIGHTS CONTROL SECTION -->
+        <h2 class="section-title">💡 Individual Light Control ({LIGHT_COUNT} Lights)</h2>
         <div class="lights-grid">
             
-            <!-- LIGHT 1 -->
-            <div class="light-card" id="light-card-1">
-                <div class="light-header">
-                    <div class="light-name">Light 1</div>
-                    <div class="light-bulb light-off" id="bulb-1">○</div>
-                </div>
-                <div class="light-info">
-                    <div class="info-item">
-                        <div class="info-label">Voltage</div>
-                        <div class="info-value" id="voltage-1">0V</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Current</div>
-                        <div class="info-value" id="current-1">0A</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Lux</div>
-                        <div class="info-value" id="lux-1">0</div>
-                    </div>
-                </div>
-                <div style="text-align: center;">
-                    <span class="status-badge status-off" id="status-1">OFF</span>
-                </div>
-                <div class="control-buttons">
-                    <button class="btn-control btn-on" onclick="controlLight(1, 'on')">⚡ Turn ON</button>
-                    <button class="btn-control btn-off" onclick="controlLight(1, 'off')">⭕ Turn OFF</button>
-                </div>
-            </div>
-            
-            <!-- LIGHT 2 -->
-            <div class="light-card" id="light-card-2">
-                <div class="light-header">
-                    <div class="light-name">Light 2</div>
-                    <div class="light-bulb light-off" id="bulb-2">○</div>
-                </div>
-                <div class="light-info">
-                    <div class="info-item">
-                        <div class="info-label">Voltage</div>
-                        <div class="info-value" id="voltage-2">0V</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Current</div>
-                        <div class="info-value" id="current-2">0A</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Lux</div>
-                        <div class="info-value" id="lux-2">0</div>
-                    </div>
-                </div>
-                <div style="text-align: center;">
-                    <span class="status-badge status-off" id="status-2">OFF</span>
-                </div>
-                <div class="control-buttons">
-                    <button class="btn-control btn-on" onclick="controlLight(2, 'on')">⚡ Turn ON</button>
-                    <button class="btn-control btn-off" onclick="controlLight(2, 'off')">⭕ Turn OFF</button>
-                </div>
-            </div>
-            
-            <!-- LIGHT 3 -->
-            <div class="light-card" id="light-card-3">
-                <div class="light-header">
-                    <div class="light-name">Light 3</div>
-                    <div class="light-bulb light-off" id="bulb-3">○</div>
-                </div>
-                <div class="light-info">
-                    <div class="info-item">
-                        <div class="info-label">Voltage</div>
-                        <div class="info-value" id="voltage-3">0V</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Current</div>
-                        <div class="info-value" id="current-3">0A</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Lux</div>
-                        <div class="info-value" id="lux-3">0</div>
-                    </div>
-                </div>
-                <div style="text-align: center;">
-                    <span class="status-badge status-off" id="status-3">OFF</span>
-                </div>
-                <div class="control-buttons">
-                    <button class="btn-control btn-on" onclick="controlLight(3, 'on')">⚡ Turn ON</button>
-                    <button class="btn-control btn-off" onclick="controlLight(3, 'off')">⭕ Turn OFF</button>
-                </div>
-            </div>
-            
-            <!-- LIGHT 4 -->
-            <div class="light-card" id="light-card-4">
-                <div class="light-header">
-                    <div class="light-name">Light 4</div>
-                    <div class="light-bulb light-off" id="bulb-4">○</div>
-                </div>
-                <div class="light-info">
-                    <div class="info-item">
-                        <div class="info-label">Voltage</div>
-                        <div class="info-value" id="voltage-4">0V</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Current</div>
-                        <div class="info-value" id="current-4">0A</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Lux</div>
-                        <div class="info-value" id="lux-4">0</div>
-                    </div>
-                </div>
-                <div style="text-align: center;">
-                    <span class="status-badge status-off" id="status-4">OFF</span>
-                </div>
-                <div class="control-buttons">
-                    <button class="btn-control btn-on" onclick="controlLight(4, 'on')">⚡ Turn ON</button>
-                    <button class="btn-control btn-off" onclick="controlLight(4, 'off')">⭕ Turn OFF</button>
-                </div>
-            </div>
-            
+            {LIGHT_CARDS}
         </div>
         
         <!-- PERFORMANCE GRAPHS -->
@@ -603,7 +697,7 @@ HTML_TEMPLATE = """
         
         <!-- LAST UPDATE -->
         <div class="last-update" id="last-update-text">
-            <strong>Last Updated:</strong> -- | <strong>Auto-refresh:</strong> Every 2 seconds
+            <strong>Last Updated:</strong> -- | <strong>Updates:</strong> Live
         </div>
     </div>
     
@@ -622,9 +716,8 @@ HTML_TEMPLATE = """
                 const data = await response.json();
 
                 if (data.success) {
-                    console.log(Light ${lightId} ${action} successful);
-                    // Immediately refresh to show changes
-                    fetchData();
+                    // The new state arrives over the event stream
+                    console.log(`Light ${lightId} ${action} successful`);
                 } else {
                     alert('Control failed: ' + (data.message || 'unknown error'));
                 }
@@ -634,46 +727,49 @@ HTML_TEMPLATE = """
             }
         }
 
-        // Function to fetch data from backend API
-        async function fetchData() {
-            try {
-                const response = await fetch('/api/data');
-                const data = await response.json();
-
-                // Update backend status
-                document.getElementById('backend-status').innerHTML = '🟢 Backend: Online';
+        // Function to apply a dashboard payload pushed by the backend
+        function applyData(data) {
+            // Update backend status
+            document.getElementById('backend-status').innerHTML = '🟢 Backend: Online';
 
-                // Update individual lights
-                updateLights(data.lights);
+            // Update individual lights
+            updateLights(data.lights, data.totals);
 
-                // Update charts with real data
-                updateCharts(data.charts);
+            // Update charts with real data
+            updateCharts(data.charts);
 
-                // Update last update time
-                document.getElementById('last-update-text').innerHTML =
-                    <strong>Last Updated:</strong> ${data.time} | <strong>Auto-refresh:</strong> Every 2 seconds;
+            // Update last update time
+            document.getElementById('last-update-text').innerHTML =
+                `<strong>Last Updated:</strong> ${data.time} | <strong>Updates:</strong> Live`;
+        }
 
-            } catch (error) {
-                console.error('Fetch error:', error);
+        // Function to subscribe to the backend event stream
+        function startStream() {
+            const source = new EventSource('/api/stream');
+            source.onmessage = e => applyData(JSON.parse(e.data));
+            source.onerror = () => {
+                // EventSource reconnects on its own; just flag the outage
                 document.getElementById('backend-status').innerHTML = '🔴 Backend: Offline';
-            }
+                if (source.readyState === EventSource.CLOSED) {
+                    // Refused (e.g. 503 when the server is full): show one
+                    // snapshot now and try the stream again later
+                    fetch('/api/data').then(r => r.json()).then(applyData).catch(() => {});
+                    setTimeout(startStream, {STREAM_RETRY_MS});
+                }
+            };
         }
 
         // Function to update light displays
-        function updateLights(lights) {
-            let totalLux = 0;
-            let totalVoltage = 0;
-            let totalCurrent = 0;
-
-            // Update each light (1-4)
-            for (let i = 0; i < 4; i++) {
+        function updateLights(lights, totals) {
+            // Update each light
+            for (let i = 0; i < lights.length; i++) {
                 const light = lights[i];
 
                 if (light) {
                     const isOn = light.relay_state === 'ON';
 
                     // Update bulb icon
-                    const bulb = document.getElementById(bulb-${i+1});
+                    const bulb = document.getElementById(`bulb-${i+1}`);
                     bulb.className = isOn ? 'light-bulb light-on' : 'light-bulb light-off';
                     bulb.textContent = isOn ? '●' : '○';
 
@@ -682,26 +778,21 @@ HTML_TEMPLATE = """
                     const current = light.current;
                     const luxValue = light.lux;
 
-                    document.getElementById(voltage-${i+1}).textContent = ${voltage}V;
-                    document.getElementById(current-${i+1}).textContent = ${current}A;
-                    document.getElementById(lux-${i+1}).textContent = luxValue;
-
-                    // Accumulate totals
-                    totalVoltage += voltage;
-                    totalCurrent += current;
-                    totalLux += luxValue;
+                    document.getElementById(`voltage-${i+1}`).textContent = `${voltage}V`;
+                    document.getElementById(`current-${i+1}`).textContent = `${current}A`;
+                    document.getElementById(`lux-${i+1}`).textContent = luxValue;
 
                     // Update status badge
-                    const statusBadge = document.getElementById(status-${i+1});
+                    const statusBadge = document.getElementById(`status-${i+1}`);
                     statusBadge.className = isOn ? 'status-badge status-on' : 'status-badge status-off';
                     statusBadge.textContent = light.relay_state;
                 }
             }
 
-            // Update overall stats
-            document.getElementById('total-voltage').innerHTML = ${totalVoltage.toFixed(1)}<span class="stat-unit">V</span>;
-            document.getElementById('total-current').innerHTML = ${totalCurrent.toFixed(1)}<span class="stat-unit">A</span>;
-            document.getElementById('total-lux').innerHTML = ${totalLux}<span class="stat-unit">Lux</span>;
+            // Update overall stats (summed by the backend)
+            document.getElementById('total-voltage').innerHTML = `${totals.voltage.toFixed(1)}<span class="stat-unit">V</span>`;
+            document.getElementById('total-current').innerHTML = `${totals.current.toFixed(1)}<span class="stat-unit">A</span>`;
+            document.getElementById('total-lux').innerHTML = `${totals.lux}<span class="stat-unit">Lux</span>`;
         }
 
         // Function to update charts with real data
@@ -709,20 +800,28 @@ HTML_TEMPLATE = """
             if (charts && voltageChart && currentChart) {
                 // Update voltage chart
                 if (charts.voltage) {
-                    voltageChart.data.labels = charts.voltage.labels;
-                    voltageChart.data.datasets[0].data = charts.voltage.data;
-                    voltageChart.update();
+                    copyInto(voltageChart.data.labels, charts.voltage.labels);
+                    copyInto(voltageChart.data.datasets[0].data, charts.voltage.data);
+                    voltageChart.update('none');
                 }
 
                 // Update current chart
                 if (charts.current) {
-                    currentChart.data.labels = charts.current.labels;
-                    currentChart.data.datasets[0].data = charts.current.data;
-                    currentChart.update();
+                    copyInto(currentChart.data.labels, charts.current.labels);
+                    copyInto(currentChart.data.datasets[0].data, charts.current.data);
+                    currentChart.update('none');
                 }
             }
         }
 
+        // Copy values into an existing chart array instead of replacing it
+        function copyInto(target, source) {
+            for (let i = 0; i < source.length; i++) {
+                target[i] = source[i];
+            }
+            target.length = source.length;
+        }
+
         // Initialize Charts
         document.addEventListener('DOMContentLoaded', function() {
             // Voltage Chart
@@ -741,6 +840,7 @@ HTML_TEMPLATE = """
                 },
                 options: {
                     responsive: true,
+                    animation: false,
                     plugins: {
                         legend: {
                             labels: {
@@ -785,6 +885,7 @@ HTML_TEMPLATE = """
                 },
                 options: {
                     responsive: true,
+                    animation: false,
                     plugins: {
                         legend: {
                             labels: {
@@ -813,9 +914,8 @@ HTML_TEMPLATE = """
                 }
             });
 
-            // Start fetching data every 2 seconds
-            fetchData(); // Initial fetch
-            setInterval(fetchData, 2000);
+            // Receive live updates from the backend
+            startStream();
         });
     </script>
 </body>
@@ -823,112 +923,273 @@ HTML_TEMPLATE = """
 """
 # ========== END OF HTML TEMPLATE ==========
 
+HTML_TEMPLATE = HTML_TEMPLATE.replace(
+    '{LIGHT_CARDS}', ''.join(LIGHT_CARD_TMPL.format(i=i) for i in range(1, NUM_LIGHTS + 1))
+).replace('{LIGHT_COUNT}', str(NUM_LIGHTS)).replace('{STREAM_RETRY_MS}', str(STREAM_RETRY_MS))
+
+# Prefer a bundled Chart.js so the dashboard loads without internet access
+if os.path.exists(os.path.join(app.static_folder, CHART_JS_FILE)):
+    CHART_JS_SRC = f"/static/{CHART_JS_FILE}"
+else:
+    CHART_JS_SRC = CHART_JS_CDN
+HTML_TEMPLATE = HTML_TEMPLATE.replace('{CHART_JS_SRC}', CHART_JS_SRC)
+
+def _minify_html(html):
+    """Strip HTML comments and collapse whitespace outside <script> blocks"""
+    parts = re.split(r'(<script.*?</script>)', html, flags=re.S)
+    for k in range(0, len(parts), 2):
+        part = re.sub(r'<!--.*?-->', '', parts[k], flags=re.S)
+        parts[k] = re.sub(r'\s+', ' ', part)
+    return ''.join(parts).strip()
+
+# The dashboard has no template placeholders, so minify and encode it once
+# at import instead of running it through Jinja on every request.
+_INDEX_BYTES = _minify_html(HTML_TEMPLATE).encode('utf-8')
+_INDEX_GZ = gzip.compress(_INDEX_BYTES)
+_INDEX_ETAG = hashlib.md5(_INDEX_BYTES).hexdigest()
+
 # ------------------ Flask Routes ------------------
+@app.route(f'/static/{CHART_JS_FILE}')
+def chart_js():
+    """Serve the versioned Chart.js bundle; browsers may keep it forever"""
+    response = send_from_directory(app.static_folder, CHART_JS_FILE, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    """Serve the precomputed dashboard page"""
+    headers = {'ETag': f'"{_INDEX_ETAG}"', 'Cache-Control': 'public, max-age=3600', 'Vary': 'Accept-Encoding'}
+    if _INDEX_ETAG in request.if_none_match:
+        return Response(status=304, headers=headers)
+
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        headers['Content-Encoding'] = 'gzip'
+        return Response(_INDEX_GZ, mimetype='text/html', headers=headers)
+    return Response(_INDEX_BYTES, mimetype='text/html', headers=headers)
 
 @app.route('/control', methods=['POST'])
 def control():
     """Control endpoint to turn lights on/off via relay"""
-    try:
-        payload = request.get_json(force=True)
-        light_id = int(payload.get("light_id", 0))
-        action = payload.get("action", "").lower()
-    except Exception as e:
-        return jsonify({"success": False, "message": "Invalid JSON payload"}), 400
+    payload = request.get_json(silent=True, cache=False)
+    if not isinstance(payload, dict):
+        return _json({"success": False, "message": "Invalid JSON payload"}, 400)
 
+    light_id = payload.get("light_id")
+    if isinstance(light_id, str) and light_id.isdigit():
+        light_id = int(light_id)
+    if type(light_id) is not int or not 1 <= light_id <= len(RELAY_PINS):
+        return _json({"success": False, "message": "Invalid light id"}, 400)
     idx = light_id - 1
-    if idx < 0 or idx >= len(RELAY_PINS):
-        return jsonify({"success": False, "message": "Invalid light id"}), 400
-
-    if action == "on":
-        GPIO.output(RELAY_PINS[idx], GPIO.LOW)
-        lights_data[idx]["relay_state"] = "ON"
-        print(f"✅ Light {light_id} turned ON (via web)")
-    elif action == "off":
-        GPIO.output(RELAY_PINS[idx], GPIO.HIGH)
-        lights_data[idx]["relay_state"] = "OFF"
-        print(f"❌ Light {light_id} turned OFF (via web)")
-    else:
-        return jsonify({"success": False, "message": "Invalid action"}), 400
-
-    return jsonify({"success": True, "status": lights_data[idx]["relay_state"]})
+
+    action = payload.get("action")
+    action = action.lower() if isinstance(action, str) else None
+    level = _ACTION_LEVEL.get(action)
+    if level is None:
+        return _json({"success": False, "message": "Invalid action"}, 400)
+
+    write_relay(idx, level)
+    state = relay_states[idx] = _ACTION_STATE[action]
+    if DEBUG:
+        print(f"{'✅' if state else '❌'} Light {light_id} turned {STATE_NAMES[state]} (via web)")
+
+    publish_payload()
+    return _json({"success": True, "status": STATE_NAMES[state]})
 
 @app.route('/api/data')
+@app.route('/api/dashboard')
 def get_data():
-    """Return current status of all lights with chart data"""
-    # Update chart history
-    current_time = datetime.now().strftime("%H:%M")
-    time_labels.append(current_time)
-    
-    # Calculate totals for history
-    total_voltage = sum(light["voltage"] for light in lights_data)
-    total_current = sum(light["current"] for light in lights_data)
-    
-    voltage_history.append(total_voltage)
-    current_history.append(total_current)
-    
-    return jsonify({
-        "lights": lights_data,
-        "time": datetime.now().strftime("%H:%M:%S"),
-        "charts": {
-            "voltage": {
-                "labels": list(time_labels),
-                "data": list(voltage_history)
-            },
-            "current": {
-                "labels": list(time_labels),
-                "data": list(current_history)
-            }
-        }
-    })
+    """Return the cached status of all lights with chart data"""
+    # Load the validator before the body; publish_payload() swaps the body
+    # first, so a stale body can never be paired with a newer validator
+    last_modified = _PAYLOAD_LAST_MODIFIED
+    body = _LATEST_PAYLOAD_JSON
+    if request.headers.get('If-Modified-Since') == last_modified:
+        return Response(status=304, headers={'Last-Modified': last_modified})
+    return Response(body, mimetype='application/json',
+                    headers={'Last-Modified': last_modified})
+
+@app.route('/api/stream')
+def stream():
+    """Push dashboard payloads to the browser as Server-Sent Events
+
+    Each open stream holds a waitress worker, so past MAX_STREAMS clients
+    get a 503 instead and the remaining workers stay free for /control.
+    """
+    q = Queue(maxsize=SSE_QUEUE_SIZE)
+    with _subscribers_lock:
+        if len(_subscribers) >= MAX_STREAMS:
+            return Response(_dumps({"success": False, "message": "Too many live clients"}),
+                            status=503, mimetype='application/json',
+                            headers={'Retry-After': str(STREAM_RETRY_MS // 1000)})
+        _subscribers.add(q)
+
+    def event_stream():
+        yield b'data: ' + _LATEST_PAYLOAD_JSON + b'\n\n'
+        while True:
+            try:
+                body = q.get(timeout=SSE_HEARTBEAT)
+            except Empty:
+                yield b': keep-alive\n\n'
+                continue
+            yield b'data: ' + body + b'\n\n'
+
+    response = Response(event_stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    # Runs when the server closes the response, even if it never started
+    response.call_on_close(lambda: _subscribers.discard(q))
+    return response
 
 # ------------------ Hardware Functions ------------------
-def read_ldr(ldr_index):
-    """Read LDR sensor value"""
-    if 0 <= ldr_index < len(LDR_PINS):
-        ldr_state = GPIO.input(LDR_PINS[ldr_index])
-        lux = 100 if ldr_state == GPIO.HIGH else 0
-        return lux
-    return 0
+def write_relay(idx, level):
+    """Drive a relay, through its cached sysfs file when one is open"""
+    fd = _relay_fds[idx]
+    if fd is not None:
+        try:
+            fd.seek(0)
+            fd.write(b'1' if level else b'0')
+            return
+        except OSError:
+            # e.g. the pin was switched to input or unexported: stop using
+            # the file and go through the GPIO library from now on
+            _relay_fds[idx] = None
+            fd.close()
+    GPIO.output(RELAY_PINS[idx], level)
+
+def write_relays(bits, mask):
+    """Drive every relay whose bit is set in mask to the matching bit in bits"""
+    if isinstance(GPIO, LgpioGPIO):
+        GPIO.output_group(RELAY_PINS, bits, mask)
+        return
+    for i in range(NUM_LIGHTS):
+        if mask >> i & 1:
+            write_relay(i, bits >> i & 1)
+
+def read_ldrs():
+    """Read every LDR sensor once and return their lux values"""
+    if isinstance(GPIO, LgpioGPIO):
+        bits = GPIO.input_group(LDR_PINS)
+        return [100 if bits >> i & 1 else 0 for i in range(len(LDR_PINS))]
+    return [100 if GPIO.input(pin) == GPIO.HIGH else 0 for pin in LDR_PINS]
 
 def auto_control_lights():
     """Automatically control lights based on LDR readings"""
-    for i in range(4):
-        lux = lights_data[i]["lux"]
-        current_status = lights_data[i]["relay_state"]
+    # Collect every relay change, then drive them with a single write
+    bits = mask = 0
+    for i in range(NUM_LIGHTS):
+        lux = lux_values[i]
+        is_on = relay_states[i]
         
-        if lux == 0 and current_status == "OFF":
-            GPIO.output(RELAY_PINS[i], GPIO.HIGH)
-            lights_data[i]["relay_state"] = "ON"
+        if lux == 0 and not is_on:
+            bits |= GPIO.HIGH << i
+            relay_states[i] = 1
             print(f"🤖 Auto: Light {i+1} turned ON (dark detected)")
-        elif lux > 0 and current_status == "ON":
-            GPIO.output(RELAY_PINS[i], GPIO.LOW)
-            lights_data[i]["relay_state"] = "OFF"
+        elif lux > 0 and is_on:
+            bits |= GPIO.LOW << i
+            relay_states[i] = 0
             print(f"🤖 Auto: Light {i+1} turned OFF (bright detected)")
+        else:
+            continue
+        mask |= 1 << i
+
+    if mask:
+        write_relays(bits, mask)
+
+# ------------------ Payload Cache ------------------
+def build_charts():
+    """Unroll the ring buffers into the chart part of the payload"""
+    head = _history_head
+    labels = time_labels[head:] + time_labels[:head]
+    return {
+        "voltage": {
+            "labels": labels,
+            "data": voltage_history[head:] + voltage_history[:head]
+        },
+        "current": {
+            "labels": labels,
+            "data": current_history[head:] + current_history[:head]
+        }
+    }
+
+def record_history():
+    """Write the current totals into the chart history"""
+    global _history_head, _charts_cache
+    time_labels[_history_head] = time.strftime("%H:%M:%S")
+    voltage_history[_history_head], current_history[_history_head], _ = latest_totals
+    _history_head = (_history_head + 1) % HISTORY_LEN
+    _charts_cache = build_charts()
+
+def build_payload():
+    """Build the dashboard payload from the current light and cached chart data"""
+    total_voltage, total_current, total_lux = latest_totals
+    return {
+        "lights": [
+            {
+                "relay_state": STATE_NAMES[relay_states[i]],
+                "lux": lux_values[i],
+                "voltage": voltages[i],
+                "current": currents[i]
+            }
+            for i in range(NUM_LIGHTS)
+        ],
+        "totals": {
+            "voltage": total_voltage,
+            "current": total_current,
+            "lux": total_lux
+        },
+        "time": time.strftime("%H:%M:%S"),
+        "charts": _charts_cache
+    }
+
+def publish_payload():
+    """Serialize the dashboard payload once and hand it to the HTTP handlers"""
+    global _LATEST_PAYLOAD_JSON, _PAYLOAD_MTIME, _PAYLOAD_LAST_MODIFIED
+    with _publish_lock:
+        body = _dumps(build_payload())
+        if body == _LATEST_PAYLOAD_JSON:
+            return
+        _LATEST_PAYLOAD_JSON = body
+        _PAYLOAD_MTIME = max(int(time.time()), _PAYLOAD_MTIME + 1)
+        _PAYLOAD_LAST_MODIFIED = formatdate(_PAYLOAD_MTIME, usegmt=True)
+
+    # Push only changed payloads to stream clients
+    for q in tuple(_subscribers):
+        try:
+            q.put_nowait(body)
+        except Full:
+            pass  # Slow client, it will catch up on the next change
+
+# Seed the caches so requests before the first sample get a full payload
+_charts_cache = build_charts()
+publish_payload()
 
 # ------------------ Sensor Loop ------------------
 def sensor_loop(stop_event):
-    """Continuously read LDR sensors"""
+    """Continuously read LDR sensors
+
+    This is the only place GPIO inputs are read; HTTP handlers serve the
+    cached payload, so GPIO reads per second do not grow with clients.
+    """
+    global latest_totals
     while not stop_event.is_set():
         # Read all sensors
-        for i in range(4):
-            lux = read_ldr(i)
-            lights_data[i]["lux"] = lux
-            # Voltage and current remain 0 (no sensors connected)
-            lights_data[i]["voltage"] = 0
-            lights_data[i]["current"] = 0
+        lux_values[:] = read_ldrs()
+        # Voltage and current remain 0 (no sensors connected)
+        voltages[:] = [0] * NUM_LIGHTS
+        currents[:] = [0] * NUM_LIGHTS
+        latest_totals = (sum(voltages), sum(currents), sum(lux_values))
         
         # Auto control if enabled
         if AUTO_MODE:
             auto_control_lights()
+
+        # Publish one payload per sample for all clients
+        record_history()
+        publish_payload()
         
-        # Sleep
-        for _ in range(int(SAMPLE_INTERVAL)):
-            if stop_event.is_set():
-                break
-            time.sleep(1)
+        # Wait for next sample (returns at once on shutdown)
+        if stop_event.wait(SAMPLE_INTERVAL):
+            break
 
 # ------------------ MAIN ------------------
 def main():
@@ -939,10 +1200,12 @@ def main():
     def handle_sigterm(signum, frame):
         print("\n🛑 Shutdown signal received, cleaning up...")
         stop_event.set()
+        # The sensor wait returns as soon as the event is set, so this is
+        # quick and the thread is done with GPIO before cleanup
+        sensor_thread.join(timeout=SAMPLE_INTERVAL)
         for pin in RELAY_PINS:
             GPIO.output(pin, GPIO.LOW)
         GPIO.cleanup()
-        time.sleep(0.5)
         sys.exit(0)
 
     signal.signal(signal.SIGINT, handle_sigterm)
@@ -950,16 +1213,19 @@ def main():
 
     try:
         print("🚀 Starting Smart Street Light Dashboard on http://0.0.0.0:5000")
-        print("📡 Monitoring 4 lights with LDR sensors")
+        print(f"📡 Monitoring {NUM_LIGHTS} lights with LDR sensors")
         print(f"🤖 Auto mode: {'ENABLED' if AUTO_MODE else 'DISABLED'}")
         print("🌐 Web interface: http://your-raspberry-pi-ip:5000")
         print("\nPress Ctrl+C to stop\n")
-        app.run(host="0.0.0.0", port=5000, threaded=True)
+        if serve is not None:
+            serve(app, host="0.0.0.0", port=5000, threads=WEB_THREADS, ident=None)
+        else:
+            app.run(host="0.0.0.0", port=5000, threaded=True)
     finally:
         stop_event.set()
         for pin in RELAY_PINS:
             GPIO.output(pin, GPIO.LOW)
         GPIO.cleanup()
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,11 +7,19 @@ Run this script on your Raspberry Pi to start the backend server.
 from backend import app
 import os
 
+try:
+    from waitress import serve
+except ImportError:
+    serve = None
+
 if __name__ == '__main__':
     print("Starting Smart Street Light Dashboard Server...")
     print("Make sure you're running this on a Raspberry Pi with GPIO access")
     print("Server will be available at: http://localhost:5000")
     print("Dashboard: http://localhost:5000/static/index.html")
 
-    # Run the Flask app
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Run the Flask app under waitress (keep-alive, fixed thread pool)
+    if serve is not None:
+        serve(app, host='0.0.0.0', port=5000, threads=4, connection_limit=64)
+    else:
+        app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -8,7 +8,7 @@ Raspberry Pi hardware control + Flask web server for 4 lights
 - Real-time status updates on webpage
 
 Installation:
-    pip3 install flask flask-cors
+    pip3 install flask flask-orjson waitress
 
 Run:
     python3 smart_street_light_complete_final.py
@@ -16,45 +16,190 @@ Run:
 Access via: http://YOUR_PI_IP:5000
 """
 
+import fcntl
+import gzip
+import logging
+import os
+import socket
+import struct
 import time
 import signal
 import sys
 import threading
-from datetime import datetime
-from flask import Flask, jsonify, request, send_from_directory
-from flask_cors import CORS
+from queue import Queue, Empty, Full
+from flask import Flask, Response, jsonify, request, send_from_directory
+
+try:
+    from waitress import serve
+except ModuleNotFoundError:
+    serve = None
+
+try:
+    from flask_orjson import OrjsonProvider
+except ModuleNotFoundError:
+    OrjsonProvider = None
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ModuleNotFoundError:
+    import json
+    
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 
 try:
     import RPi.GPIO as GPIO
 except (RuntimeError, ModuleNotFoundError):
-    import lgpio as GPIO
+    import lgpio
+    GPIO = None  # Replaced by LgpioGPIO below
+
+# ------------------ lgpio Adapter ------------------
+class LgpioGPIO:
+    """RPi.GPIO-style wrapper that keeps one lgpio chip handle open
+    
+    The chip is opened once and each pin is claimed once in setup(), so
+    reads and writes go straight to the claimed line. add_event_detect()
+    re-claims an input for edge alerts and runs the callback from lgpio's
+    callback thread, like RPi.GPIO does.
+    """
+    BCM = "BCM"
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 0
+    PUD_DOWN = 64  # lgpio.SET_PULL_DOWN line flag
+    BOTH = "BOTH"  # only both-edge detection is used here
+    
+    def __init__(self, chip=0):
+        self._handle = lgpio.gpiochip_open(chip)
+        self._pulls = {}      # input pin -> pull flags it was claimed with
+        self._callbacks = []  # lgpio callback objects, cancelled in cleanup()
+    
+    def setmode(self, mode):
+        pass  # lgpio always uses BCM numbering
+    
+    def setwarnings(self, flag):
+        pass
+    
+    def setup(self, pin, direction, pull_up_down=PUD_OFF):
+        if direction == self.OUT:
+            lgpio.gpio_claim_output(self._handle, pin, self.LOW)
+        else:
+            lgpio.gpio_claim_input(self._handle, pin, pull_up_down)
+            self._pulls[pin] = pull_up_down
+    
+    def output(self, pin, level):
+        lgpio.gpio_write(self._handle, pin, level)
+    
+    def input(self, pin):
+        return lgpio.gpio_read(self._handle, pin)
+    
+    def add_event_detect(self, pin, edge, callback, bouncetime=0):
+        """Call callback(pin) on every edge of an input claimed in setup()"""
+        try:
+            lgpio.gpio_free(self._handle, pin)
+            lgpio.gpio_claim_alert(self._handle, pin, lgpio.BOTH_EDGES, self._pulls.get(pin, self.PUD_OFF))
+            if bouncetime:
+                lgpio.gpio_set_debounce_micros(self._handle, pin, bouncetime * 1000)
+        except lgpio.error as e:
+            raise RuntimeError(f"GPIO {pin}: {e}") from e
+        self._callbacks.append(lgpio.callback(
+            self._handle, pin, lgpio.BOTH_EDGES,
+            lambda chip, gpio, level, tick: callback(gpio)))
+    
+    def cleanup(self):
+        for cb in self._callbacks:
+            cb.cancel()
+        self._callbacks.clear()
+        lgpio.gpiochip_close(self._handle)
+
+if GPIO is None:
+    GPIO = LgpioGPIO()
 
 # ------------------ CONFIG ------------------
 SAMPLE_INTERVAL = 2                       # seconds between sensor readings
 RELAY_PINS = [17, 18, 27, 22]             # GPIO pins for 4-channel relay (BCM)
 LDR_PINS = [5, 6, 13, 19]                 # digital inputs for 4 LDRs (BCM)
 AUTO_MODE = True                          # Enable automatic LDR control
+AUTO_LIGHTS_MASK = 0b0111                 # lights under LDR control (bit i = light i+1); light 4's sensor failed
 WEB_PORT = 5000                           # Flask web server port
+HEARTBEAT_INTERVAL = 10                   # seconds between full resyncs when LDR edge events work
+MANUAL_OVERRIDE_SECONDS = 30              # auto control pauses this long after a button press
+DASHBOARD_FILE = "dashboard.html"         # dashboard page, read once at startup
+STATUS_EVERY = 10                         # log the status table every N loop passes
+DEBUG = os.environ.get("SSL_DEBUG", "0") == "1"  # also log the status table
+SSE_HEARTBEAT = 3                         # seconds between keep-alive comments; a closed tab frees its worker within this
+SSE_QUEUE_SIZE = 8                        # pending updates per client before they are dropped
+WEB_THREADS = 8                           # waitress worker threads; each open /api/stream holds one
+MAX_STREAMS = WEB_THREADS - 2             # leave workers free for /control and page loads
+STREAM_RETRY_AFTER = 10                   # seconds a refused stream client should wait
+
+logging.basicConfig(level=logging.DEBUG if DEBUG else logging.INFO,
+                    format="%(asctime)s %(levelname)s %(message)s")
+log = logging.getLogger("slight")
+
+# Manual override expiry times (time.monotonic()) set when user clicks buttons
+override_until = [0, 0, 0, 0]
 
-# Manual override flags (when user clicks buttons)
-manual_override = {
-    "light1": False,
-    "light2": False,
-    "light3": False,
-    "light4": False
-}
+def manual_override(i):
+    """True while a button press still holds light i (0-3) in manual mode"""
+    return override_until[i] > time.monotonic()
 
 # ------------------ GLOBAL DATA ------------------
-lights_data = {
-    "light1": {"status": "OFF", "lux": 100},  # Default lux = 100
-    "light2": {"status": "OFF", "lux": 100},  # Default lux = 100
-    "light3": {"status": "OFF", "lux": 100},  # Default lux = 100
-    "light4": {"status": "OFF", "lux": -1}    # Light 4: Sensor Failed (always -1)
-}
+# One flat list per field, indexed by light (0-3)
+relay_states = [0, 0, 0, 0]               # 0 = OFF, 1 = ON
+lux_values = [100, 100, 100, -1]          # Default lux = 100; Light 4: Sensor Failed (always -1)
+STATE_NAMES = ("OFF", "ON")
+LIGHT_KEYS = ("light1", "light2", "light3", "light4")
+
+# Serializes relay decisions: the auto-control pass (hardware loop and the
+# GPIO edge-callback thread) and button presses in control_light()
+control_lock = threading.Lock()
+
+def snapshot():
+    """Build the JSON-facing light data: {"light1": {"status": "ON", "lux": 0}, ...}"""
+    return {
+        LIGHT_KEYS[i]: {"status": STATE_NAMES[relay_states[i]], "lux": lux_values[i]}
+        for i in range(4)
+    }
+
+# Snapshot taken after each complete update, and the JSON body
+# serialized from it. Readers use them without locking (rebinding a global
+# is atomic and neither is ever mutated); push_lock only keeps the writer
+# threads from publishing over each other.
+latest_snapshot = snapshot()
+latest_body = b'{}'
+push_lock = threading.Lock()
+
+# Bumped only when the light data actually changes; /api/data sends it as
+# a weak ETag. latest_etag is written after latest_body and read before it,
+# so a reader can pair an old tag with a new body but never the reverse.
+# The start time in the tag keeps a restart from reusing old versions.
+STARTED = int(time.time())
+state_version = 0
+latest_etag = f'W/"{STARTED}-0"'
+
+# Live update fan-out: one queue per connected /api/stream client, at most MAX_STREAMS
+subscribers = set()
+subscribers_lock = threading.Lock()
 
 # ------------------ FLASK APP ------------------
 app = Flask(__name__)
-CORS(app)
+if OrjsonProvider is not None:
+    app.json = OrjsonProvider(app)
+else:
+    # Machine-read JSON: no key sorting, no pretty-printing
+    app.json.sort_keys = False
+    app.json.compact = True
+
+@app.after_request
+def allow_any_origin(response):
+    """Let pages from other origins use the API (fixed headers, no per-request matching)"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'  # JSON POST preflight
+    return response
 
 # ------------------ GPIO Setup ------------------
 GPIO.setmode(GPIO.BCM)
@@ -72,15 +217,15 @@ def turn_light_on(light_index, source="manual"):
     """Turn on a specific light (0-3)"""
     if 0 <= light_index < len(RELAY_PINS):
         GPIO.output(RELAY_PINS[light_index], GPIO.HIGH)
-        lights_data[f"light{light_index+1}"]["status"] = "ON"
-        print(f"✅ Light {light_index+1} turned ON ({source})")
+        relay_states[light_index] = 1
+        log.info("✅ Light %d turned ON (%s)", light_index + 1, source)
 
 def turn_light_off(light_index, source="manual"):
     """Turn off a specific light (0-3)"""
     if 0 <= light_index < len(RELAY_PINS):
         GPIO.output(RELAY_PINS[light_index], GPIO.LOW)
-        lights_data[f"light{light_index+1}"]["status"] = "OFF"
-        print(f"❌ Light {light_index+1} turned OFF ({source})")
+        relay_states[light_index] = 0
+        log.info("❌ Light %d turned OFF (%s)", light_index + 1, source)
 
 def read_ldr(ldr_index):
     """Read LDR sensor value (0-3)
@@ -106,57 +251,83 @@ def read_ldr(ldr_index):
             return lux
         return -1  # Sensor not available
     except Exception as e:
-        print(f"❌ LDR {ldr_index+1} read error: {e}")
+        log.error("❌ LDR %d read error: %s", ldr_index + 1, e)
         return -1  # Sensor failed
 
 def update_sensors():
     """Read all LDR sensors and update light data"""
     for i in range(4):
-        lux = read_ldr(i)
-        lights_data[f"light{i+1}"]["lux"] = lux
+        lux_values[i] = read_ldr(i)
 
 def auto_control_lights():
-    """Automatically control lights based on LDR readings
+    """Automatically control all lights based on LDR readings
     Dark (lux=0) -> Turn ON
     Bright (lux>0) -> Turn OFF
-    Only for lights without manual override
+    Failed (lux=-1) -> Leave as is
+    Only for lights in AUTO_LIGHTS_MASK without manual override.
+    States are packed into bitmasks (bit i = light i+1) and only the
+    lights whose state must change are written.
     """
     if not AUTO_MODE:
         return
     
-    for i in range(4):
-        light_key = f"light{i+1}"
-        
-        # Skip if manual override is active
-        if manual_override[light_key]:
-            continue
-        
-        # Skip Light 4 (sensor failed)
-        if i == 3:
-            continue
+    # Held from reading the masks to the last write, so a button press
+    # cannot land between them and get switched straight back
+    with control_lock:
+        on_mask = dark_mask = bright_mask = override_mask = 0
+        for i in range(4):
+            on_mask |= relay_states[i] << i
+            lux = lux_values[i]
+            if lux == 0:
+                dark_mask |= 1 << i
+            elif lux > 0:
+                bright_mask |= 1 << i
+            if manual_override(i):
+                override_mask |= 1 << i
         
-        lux = lights_data[light_key]["lux"]
-        current_status = lights_data[light_key]["status"]
+        # Lights under auto control with a valid reading follow the LDR,
+        # every other light keeps its current state
+        auto = AUTO_LIGHTS_MASK & ~override_mask & (dark_mask | bright_mask)
+        desired = (on_mask & ~auto) | (dark_mask & auto)
         
-        # Auto control logic:
-        # If DARK (lux = 0) and light is OFF -> Turn ON
-        if lux == 0 and current_status == "OFF":
-            turn_light_on(i, source="auto-LDR")
-        
-        # If BRIGHT (lux > 0) and light is ON -> Turn OFF
-        elif lux > 0 and current_status == "ON":
-            turn_light_off(i, source="auto-LDR")
+        diff = desired ^ on_mask
+        while diff:
+            i = (diff & -diff).bit_length() - 1
+            if desired >> i & 1:
+                turn_light_on(i, source="auto-LDR")
+            else:
+                turn_light_off(i, source="auto-LDR")
+            diff &= diff - 1
+
+def on_ldr_change(pin):
+    """GPIO edge callback: react to an LDR transition immediately"""
+    i = LDR_PINS.index(pin)
+    lux_values[i] = read_ldr(i)
+    auto_control_lights()
+    push_update()
+
+def setup_ldr_events():
+    """Register edge callbacks for the working LDRs (lights 1-3)
+    Returns False when edge detection is unavailable, so the caller polls instead
+    """
+    try:
+        for pin in LDR_PINS[:3]:
+            GPIO.add_event_detect(pin, GPIO.BOTH, callback=on_ldr_change, bouncetime=50)
+    except (RuntimeError, AttributeError) as e:
+        log.warning("⚠️  LDR edge detection unavailable (%s), polling every %ss", e, SAMPLE_INTERVAL)
+        return False
+    return True
 
 def print_status():
-    """Print current status of all lights"""
-    print("\n" + "="*70)
-    print(f"Status Update - {time.strftime('%H:%M:%S')}")
-    print("="*70)
+    """Log current status of all lights as one debug record"""
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    
+    lines = ["Status Update", "="*70]
     for i in range(4):
-        light_key = f"light{i+1}"
-        status = lights_data[light_key]["status"]
-        lux = lights_data[light_key]["lux"]
-        override = "🔒 MANUAL" if manual_override[light_key] else "🤖 AUTO"
+        status = STATE_NAMES[relay_states[i]]
+        lux = lux_values[i]
+        override = "🔒 MANUAL" if manual_override(i) else "🤖 AUTO"
         
         if lux == -1:
             lux_str = "FAILED"
@@ -168,28 +339,118 @@ def print_status():
             lux_str = f"{lux:3d} (BRIGHT)"
             symbol = "☀️"
             
-        print(f"💡 Light {i+1}: {status:3s} | {lux_str:15s} {symbol} | {override}")
-    print("="*70)
+        lines.append(f"💡 Light {i+1}: {status:3s} | {lux_str:15s} {symbol} | {override}")
+    lines.append("="*70)
+    log.debug("\n".join(lines))
+
+# ------------------ Live Updates ------------------
+def data_payload():
+    """Current light status and sensor data, as served to the dashboard"""
+    return {
+        'lights': latest_snapshot,
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'success': True
+    }
+
+def push_update():
+    """Publish a snapshot of the light data and its JSON body once per update
+    Stream clients are only sent the body when the light data changed
+    """
+    global latest_snapshot, latest_body, state_version, latest_etag
+    with push_lock:
+        current = snapshot()
+        changed = current != latest_snapshot
+        latest_snapshot = current
+        body = latest_body = _dumps(data_payload())
+        if changed:
+            state_version += 1
+            latest_etag = f'W/"{STARTED}-{state_version}"'
+    
+    if not changed:
+        return
+    for q in tuple(subscribers):
+        try:
+            q.put_nowait(body)
+        except Full:
+            pass  # Slow client, it will catch up on the next change
+
+# Seed the body so requests before the first hardware pass get full data
+push_update()
 
 # ------------------ Flask Routes ------------------
+def load_dashboard():
+    """Read the dashboard once and keep plain and gzip copies in memory
+    Resolved against app.root_path, like the send_from_directory fallback
+    """
+    try:
+        with open(os.path.join(app.root_path, DASHBOARD_FILE), 'rb') as f:
+            html = f.read()
+    except OSError:
+        return None, None
+    return html, gzip.compress(html)
+
+dashboard_html, dashboard_gz = load_dashboard()
+
 @app.route('/')
 def index():
     """Serve the main dashboard HTML"""
-    return send_from_directory('.', 'dashboard.html')
+    if dashboard_html is None:
+        return send_from_directory('.', DASHBOARD_FILE, max_age=3600)
+    
+    headers = {'Cache-Control': 'public, max-age=3600', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        headers['Content-Encoding'] = 'gzip'
+        return Response(dashboard_gz, mimetype='text/html', headers=headers)
+    return Response(dashboard_html, mimetype='text/html', headers=headers)
 
 @app.route('/api/data')
 def get_data():
-    """API endpoint to get current light status and sensor data"""
-    return jsonify({
-        'lights': lights_data,
-        'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'success': True
-    })
+    """API endpoint to get current light status and sensor data
+    Returns the body serialized by the last push_update(), as is, or
+    304 Not Modified when the light data has not changed since the
+    client's copy
+    """
+    etag = latest_etag
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers={'ETag': etag})
+    return Response(latest_body, mimetype='application/json', headers={'ETag': etag})
+
+@app.route('/api/stream')
+def stream():
+    """Push light data to the browser as Server-Sent Events
+    Each open stream holds a waitress worker, so past MAX_STREAMS clients
+    get a 503 instead and the remaining workers stay free for /control
+    """
+    q = Queue(maxsize=SSE_QUEUE_SIZE)
+    with subscribers_lock:
+        if len(subscribers) >= MAX_STREAMS:
+            return jsonify({
+                'success': False,
+                'message': 'Too many live clients'
+            }), 503, {'Retry-After': str(STREAM_RETRY_AFTER)}
+        subscribers.add(q)
+    
+    def event_stream():
+        # Start every client from the current state
+        yield b'data: ' + latest_body + b'\n\n'
+        while True:
+            try:
+                body = q.get(timeout=SSE_HEARTBEAT)
+            except Empty:
+                yield b': keep-alive\n\n'
+                continue
+            yield b'data: ' + body + b'\n\n'
+    
+    response = Response(event_stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    # Runs when the server closes the response, even if it never started
+    response.call_on_close(lambda: subscribers.discard(q))
+    return response
 
 @app.route('/control', methods=['POST'])
 def control_light():
     """API endpoint to control lights - REAL-TIME HARDWARE CONTROL
-    Sets manual override for 30 seconds, then returns to auto mode
+    Sets manual override for MANUAL_OVERRIDE_SECONDS, then returns to auto mode
     """
     try:
         data = request.json
@@ -209,35 +470,28 @@ def control_light():
                 'message': f'Invalid action: {action}. Must be "on" or "off".'
             }), 400
         
-        light_key = f"light{light_id}"
-        
-        # Set manual override (disable auto mode for this light temporarily)
-        manual_override[light_key] = True
-        
-        # Schedule to clear manual override after 30 seconds
-        def clear_override():
-            time.sleep(30)
-            manual_override[light_key] = False
-            print(f"🔓 Light {light_id} returned to AUTO mode")
-        
-        threading.Thread(target=clear_override, daemon=True).start()
-        
-        # REAL-TIME HARDWARE CONTROL
-        if action == 'on':
-            turn_light_on(light_id - 1, source="web-button")
-        else:
-            turn_light_off(light_id - 1, source="web-button")
+        # Set manual override (disable auto mode for this light temporarily);
+        # it simply expires, so no timer thread is needed. Taken together with
+        # the REAL-TIME HARDWARE CONTROL under control_lock, so an auto pass
+        # sees either both or neither
+        with control_lock:
+            override_until[light_id - 1] = time.monotonic() + MANUAL_OVERRIDE_SECONDS
+            if action == 'on':
+                turn_light_on(light_id - 1, source="web-button")
+            else:
+                turn_light_off(light_id - 1, source="web-button")
+        push_update()
         
         return jsonify({
             'success': True,
-            'message': f'Light {light_id} turned {action.upper()} (Manual mode for 30s)',
+            'message': f'Light {light_id} turned {action.upper()} (Manual mode for {MANUAL_OVERRIDE_SECONDS}s)',
             'light_id': light_id,
             'action': action,
-            'new_status': lights_data[light_key]["status"]
+            'new_status': STATE_NAMES[relay_states[light_id - 1]]
         })
         
     except Exception as e:
-        print(f"❌ Control error: {e}")
+        log.error("❌ Control error: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -246,11 +500,14 @@ def control_light():
 # ------------------ Hardware Loop ------------------
 def hardware_loop(stop_event):
     """Main hardware control loop - runs in background thread"""
-    print("\n🔧 Hardware monitoring thread started")
-    print("🤖 Automatic LDR control ENABLED")
-    print("   - Dark detected (LDR LOW) -> Light ON")
-    print("   - Bright detected (LDR HIGH) -> Light OFF\n")
+    log.info("🔧 Hardware monitoring thread started")
+    log.info("🤖 Automatic LDR control ENABLED (dark -> ON, bright -> OFF)")
     
+    # LDR edges are handled by on_ldr_change as they happen; this loop is
+    # then only a heartbeat that resyncs and logs status
+    interval = HEARTBEAT_INTERVAL if setup_ldr_events() else SAMPLE_INTERVAL
+    
+    cycle = 0
     while not stop_event.is_set():
         # Update sensor readings
         update_sensors()
@@ -258,11 +515,48 @@ def hardware_loop(stop_event):
         # Auto control lights based on LDR
         auto_control_lights()
         
-        # Print status to console
-        print_status()
+        # Serialize once for all clients; streams only get it on change
+        push_update()
+        
+        # Log status now and then, not on every pass
+        if cycle % STATUS_EVERY == 0:
+            print_status()
+        cycle += 1
         
-        # Wait for next sample
-        time.sleep(SAMPLE_INTERVAL)
+        # Wait for next sample (returns at once on shutdown)
+        stop_event.wait(interval)
+
+# ------------------ Network ------------------
+SIOCGIFADDR = 0x8915  # ioctl: IPv4 address of an interface
+pi_ip = None          # cached by get_pi_ip()
+
+def get_pi_ip():
+    """IPv4 address of the default-route interface, looked up locally once
+    Reads /proc/net/route and asks the kernel for that interface's address,
+    so nothing is sent on the network. Returns "localhost" when offline.
+    """
+    global pi_ip
+    if pi_ip is not None:
+        return pi_ip
+    
+    pi_ip = "localhost"
+    try:
+        with open('/proc/net/route') as f:
+            next(f)  # header
+            for line in f:
+                fields = line.split()
+                if fields[1] == '00000000':  # default route
+                    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    try:
+                        ifreq = fcntl.ioctl(s.fileno(), SIOCGIFADDR,
+                                            struct.pack('256s', fields[0][:15].encode()))
+                    finally:
+                        s.close()
+                    pi_ip = socket.inet_ntoa(ifreq[20:24])
+                    break
+    except (OSError, StopIteration, IndexError):
+        pass
+    return pi_ip
 
 # ------------------ MAIN ------------------
 def main():
@@ -292,14 +586,7 @@ def main():
     hardware_thread.start()
 
     # Get Pi IP address
-    import socket
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        pi_ip = s.getsockname()[0]
-        s.close()
-    except:
-        pi_ip = "localhost"
+    pi_ip = get_pi_ip()
 
     print("\n" + "="*80)
     print("🚀 Smart Street Light System Started - FULL FUNCTIONALITY")
@@ -314,8 +601,8 @@ def main():
     print(f"   ✅ Auto LDR Control: Lights turn ON when dark, OFF when bright")
     print(f"   ✅ Light 1-3: Normal operation (12V, 0.6A, LDR-based lux)")
     print(f"   ✅ Light 4: Sensor Failed Status (always N/A)")
-    print(f"   ✅ Manual Override: 30 seconds after button press, returns to auto")
-    print(f"   ✅ Real-time Updates: Webpage updates every 2 seconds")
+    print(f"   ✅ Manual Override: {MANUAL_OVERRIDE_SECONDS} seconds after button press, returns to auto")
+    print(f"   ✅ Real-time Updates: Pushed to the webpage as they change")
     print(f"\n🤖 Auto Mode Logic:")
     print(f"   - LDR senses DARK (LOW) → Light turns ON")
     print(f"   - LDR senses BRIGHT (HIGH) → Light turns OFF")
@@ -323,8 +610,11 @@ def main():
     print("="*80 + "\n")
 
     try:
-        # Start Flask web server
-        app.run(host='0.0.0.0', port=WEB_PORT, debug=False, use_reloader=False)
+        # Start web server (waitress when installed, Flask's server otherwise)
+        if serve is not None:
+            serve(app, host='0.0.0.0', port=WEB_PORT, threads=WEB_THREADS, connection_limit=64)
+        else:
+            app.run(host='0.0.0.0', port=WEB_PORT, threaded=True)
     except KeyboardInterrupt:
         handle_sigterm(None, None)
     finally: